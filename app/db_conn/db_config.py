@@ -1,8 +1,42 @@
-from dotenv import find_dotenv, dotenv_values
+from functools import lru_cache
+import os
 import pathlib
 
-file_path = pathlib.Path().cwd()
-static_dir = str(pathlib.Path(pathlib.Path().cwd(), "static"))
-config = dotenv_values(find_dotenv(f"{file_path}/.env"))
 
-DATABASE_URL = config.get("DATABASE_URL")
+# names served as module attributes, see __getattr__
+SETTINGS = ("static_dir", "DATABASE_URL", "REDIS_HOST", "REDIS_PORT", "POLL_COMPACTION_AGE_DAYS",
+            "REPORT_DEADLINE_SECONDS", "REPORT_MAX_WORKERS")
+
+
+@lru_cache(maxsize=None)
+def get_config() -> dict:
+    """
+    Settings from the .env of the current working directory
+    read on first use, not at import, so importing the app stays cheap
+    """
+    from dotenv import find_dotenv, dotenv_values
+
+    file_path = pathlib.Path().cwd()
+    config = dotenv_values(find_dotenv(f"{file_path}/.env"))
+
+    return {
+        "static_dir": str(pathlib.Path(file_path, "static")),
+        "DATABASE_URL": config.get("DATABASE_URL"),
+        # Redis connection, created in the app lifespan
+        "REDIS_HOST": config.get("REDIS_HOST") or "localhost",
+        "REDIS_PORT": int(config.get("REDIS_PORT") or 6379),
+        # polls older than this are compacted into store_status_interval
+        "POLL_COMPACTION_AGE_DAYS": int(config.get("POLL_COMPACTION_AGE_DAYS") or 14),
+        # reports running longer than this are stopped and marked failed
+        "REPORT_DEADLINE_SECONDS": int(config.get("REPORT_DEADLINE_SECONDS") or 1800),
+        # worker processes a single report may use, half the cores by default
+        "REPORT_MAX_WORKERS": int(config.get("REPORT_MAX_WORKERS") or max(1, (os.cpu_count() or 1) // 2)),
+    }
+
+
+def __getattr__(name):
+    # module level settings, e.g. `from app.db_conn.db_config import DATABASE_URL`
+    # other names (dunders probed by the import system, typos) never load the config
+    if name not in SETTINGS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return get_config()[name]
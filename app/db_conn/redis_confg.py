@@ -1,6 +1,7 @@
-import redis
 from enum import Enum
 
+from app.db_conn.db_config import get_config
+
 class ReportStatus(str, Enum):
     """
     Report Status enum
@@ -9,16 +10,27 @@ class ReportStatus(str, Enum):
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 # Redis configuration
-redis_client = redis.Redis(
-    host='localhost',
-    port=6379,
-    db=0,
-    decode_responses=True
-)
+def create_redis_client():
+    """
+    Build the Redis client, called from the app lifespan
+    """
+    import redis
+
+    config = get_config()
+    return redis.Redis(
+        host=config["REDIS_HOST"],
+        port=config["REDIS_PORT"],
+        db=0,
+        decode_responses=True
+    )
 
 # Redis key patterns
 REPORT_STATUS_KEY = "report:status:{report_id}"
-REPORT_DATA_KEY = "report:data:{report_id}"
-REPORT_PROGRESS_KEY = "report:progress:{report_id}"
\ No newline at end of file
+REPORT_DATA_KEY = "report:data:{report_id}"  # hash: store_id -> report row
+REPORT_RANK_KEY = "report:rank:{report_id}:{metric}"  # sorted set: store_id scored by metric
+REPORT_PROGRESS_KEY = "report:progress:{report_id}"
+REPORT_CANCEL_KEY = "report:cancel:{report_id}"  # set while a cancel is requested
+REPORT_INDEX_KEY = "report:index"  # sorted set: report_id scored by created_at (epoch seconds)
\ No newline at end of file
@@ -7,6 +7,11 @@ class StoreReportsStatus(models.Model):
     """
     report_id = fields.UUIDField(primary_key=True)
     status = fields.BooleanField(default=False)
+    # created timestamp
+    created_at = fields.DatetimeField(null=True, auto_now_add=True, db_index=True)
+    # set once the report completed, failed or was cancelled
+    completed_at = fields.DatetimeField(null=True)
+    duration_seconds = fields.FloatField(null=True)
 
 """
 StoreReportsStatus pydantic model
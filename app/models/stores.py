@@ -24,6 +24,21 @@ class StoreTimeZone(models.Model):
     class Meta:
         table = "timezone_store"
 
+class StoreStatusInterval(models.Model):
+    """
+    Run-length-encoded store status
+    one row per run of identical consecutive polls, compacted from store_status
+    """
+    store_id = fields.UUIDField(null=False, unique=False)
+    # first and last poll of the run, in UTC
+    start_utc = fields.DatetimeField(null=False, use_tz=True)
+    end_utc = fields.DatetimeField(null=False, use_tz=True)
+    status = fields.BooleanField(default=False, null=False) # True => active, False => inactive
+
+    class Meta:
+        table = "store_status_interval"
+        indexes = (("store_id", "start_utc"), ("start_utc", "end_utc"))
+
 
 """
 create Store pydantic model
@@ -1,16 +1,28 @@
-from app.db_conn.db_config import DATABASE_URL
+from functools import lru_cache
 
-TORTOISE_ORM = {
-    "connections": {"default": DATABASE_URL},
-    "apps": {
-        "pnwapi": {
-            "models": [
-                "app.models.stores",
-                "app.models.business_menu",
-                "app.models.report",
-                "aerich.models"
-            ],
-            "default_connection": "default",
+from app.db_conn.db_config import get_config
+
+
+@lru_cache(maxsize=None)
+def get_tortoise_config() -> dict:
+    return {
+        "connections": {"default": get_config()["DATABASE_URL"]},
+        "apps": {
+            "pnwapi": {
+                "models": [
+                    "app.models.stores",
+                    "app.models.business_menu",
+                    "app.models.report",
+                    "aerich.models"
+                ],
+                "default_connection": "default",
+            }
         }
     }
-}
+
+
+def __getattr__(name):
+    # TORTOISE_ORM is built on first access (aerich: app.orm_conn.tortoise_config.TORTOISE_ORM)
+    if name == "TORTOISE_ORM":
+        return get_tortoise_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
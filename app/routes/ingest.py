@@ -0,0 +1,88 @@
+import json
+
+from fastapi import APIRouter, Request, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
+
+from app.schema.store import StorePollingIngest
+from app.utils.poll_ingestion import PollBuffer, PollBufferFull
+
+router = APIRouter(prefix="/polls", tags=["Polls"])
+
+# Initialize poll buffer, flusher is started in the app lifespan
+poll_buffer = PollBuffer()
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+def parse_poll_payload(body: bytes, content_type: str) -> list:
+    """
+    Parse a batched poll payload
+    NDJSON: one poll object per line
+    JSON: a list of polls or {"polls": [...]}
+    """
+    if content_type.split(";")[0].strip().lower() in NDJSON_CONTENT_TYPES:
+        return [json.loads(line) for line in body.splitlines() if line.strip()]
+
+    payload = json.loads(body) if body else []
+    if isinstance(payload, dict):
+        payload = payload.get("polls", [payload])
+    if not isinstance(payload, list):
+        raise ValueError("Expected a list of polls")
+    return payload
+
+
+@router.post("/ingest", status_code=202, response_model=dict)
+async def ingest_polls(request: Request):
+    """
+    Accept a batch of store polls
+    polls are validated against StorePollingIngest (store_id required) and buffered,
+    the buffer is flushed to store_status in the background
+    a batch is all or nothing: any invalid poll rejects it with 422,
+    a full buffer rejects it with 429, a batch larger than the buffer with 413
+    """
+    try:
+        raw_polls = parse_poll_payload(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Malformed poll payload: {str(e)}")
+
+    polls, errors = [], []
+    for index, raw_poll in enumerate(raw_polls):
+        try:
+            polls.append(StorePollingIngest(**raw_poll).dict())
+        except (ValidationError, TypeError) as e:
+            errors.append({"index": index, "error": str(e)})
+            if len(errors) >= 20:
+                break
+    if errors:
+        raise HTTPException(status_code=422, detail={"message": "Invalid polls in batch", "errors": errors})
+
+    # a batch larger than the buffer never fits, retrying it would not help
+    if len(polls) > poll_buffer.max_buffer:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(polls)} polls exceeds the buffer capacity of {poll_buffer.max_buffer}, "
+                   f"split it into batches of at most {poll_buffer.max_buffer} polls"
+        )
+
+    try:
+        buffered = poll_buffer.add(polls)
+    except PollBufferFull as e:
+        return JSONResponse(
+            status_code=429,
+            content={"detail": str(e)},
+            headers={"Retry-After": str(max(1, int(poll_buffer.flush_interval)))}
+        )
+
+    return {
+        "accepted": len(polls),
+        "buffered": buffered
+    }
+
+
+@router.get("/metrics", response_model=dict)
+async def ingest_metrics():
+    """
+    Ingestion rate, buffer depth and flush latency
+    """
+    return poll_buffer.metrics()
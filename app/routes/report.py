@@ -1,19 +1,43 @@
+import asyncio
+import importlib
+import math
+from datetime import datetime, timezone
+from typing import Optional
 
-from fastapi import APIRouter, Request, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Request, HTTPException, BackgroundTasks, Query
 
-from app.db_conn.redis_confg import redis_client, ReportStatus
+from app.db_conn.redis_confg import ReportStatus
 from app.utils.common import generate_unique_report_id
 from app.models.report import StoreReportsStatus, store_report_status
-from app.utils.data_processor import BusinessAnalyzer
-from app.utils.report_management import ReportManager
+from app.utils.report_management import ReportManager, REPORT_METRICS, PARTIAL_PROGRESS_FIELDS
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
 
-# Initialize report manager
-report_manager = ReportManager(redis_client)
+# Initialize report manager, Redis client is bound in the app lifespan
+report_manager = ReportManager()
+
+
+def import_report_engine():
+    """
+    Import the report engine modules, they pull in pandas and numpy
+    called through asyncio.to_thread, the first import takes long enough to stall every other request
+    """
+    importlib.import_module("app.utils.data_processor")
+    importlib.import_module("app.utils.report_preview")
+
+
+async def run_report(analyzer, report_preview=None):
+    """Run the exact report and, when asked, its sampled preview side by side"""
+    jobs = [analyzer.main()]
+    if report_preview is not None:
+        jobs.append(report_preview.publish(report_manager))
+    await asyncio.gather(*jobs)
+
 
 @router.get("/trigger_report", response_model=dict)
-async def generate_reports(background_tasks: BackgroundTasks):
+async def generate_reports(background_tasks: BackgroundTasks,
+                           deadline_seconds: Optional[int] = Query(None, ge=1),
+                           preview: bool = False):
     try:
         """
         Trigger report generation and return report_id immediately
@@ -26,10 +50,18 @@ async def generate_reports(background_tasks: BackgroundTasks):
             interpolation missing business hour windows
             calculate uptime & downtimes for each time windows
         generate report:
-        :param request:
+        :param deadline_seconds: stop the report after this many seconds,
+            capped at REPORT_DEADLINE_SECONDS
+        :param preview: also compute an approximate uptime estimate from a stratified
+            sample of stores, published on the report status beside the exact report
         :return: report_id
         """
 
+        # report engine pulls in pandas, imported on first trigger only, in a thread
+        await asyncio.to_thread(import_report_engine)
+        from app.utils.data_processor import BusinessAnalyzer
+        from app.utils.report_preview import ReportPreview
+
         # Generate a unique report_id
         report_id = await generate_unique_report_id()
 
@@ -40,15 +72,24 @@ async def generate_reports(background_tasks: BackgroundTasks):
         report_data = store_report_status(report_id=report_id, status=False)
         await StoreReportsStatus.create(**report_data.dict())
 
-        # Start background task
-        analyzer = BusinessAnalyzer(report_id=report_id)
-        background_tasks.add_task(analyzer.main)
+        # Start background tasks
+        # the sampled estimate runs beside the exact report, off the event loop and bounded in time,
+        # and is kept on the report status until the exact report completes
+        analyzer = BusinessAnalyzer(report_id=report_id, deadline_seconds=deadline_seconds)
+        report_preview = None
+        if preview:
+            report_preview = ReportPreview(report_id)
+            await report_manager.update_report_details(report_id, {"preview": {"status": "pending"}})
+        background_tasks.add_task(run_report, analyzer, report_preview)
 
-        return {
+        response = {
             "report_id": str(report_id),
             "status": "pending",
             "message": "Report generation started. Use /report_status/{report_id} to check progress."
         }
+        if preview:
+            response["preview"] = {"status": "pending"}
+        return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to start report generation: {str(e)}")
 
@@ -77,6 +118,14 @@ async def get_report_status(report_id: str):
         "updated_at": status_info.get("updated_at")
     }
 
+    # How far a failed or cancelled report got before it stopped
+    if status_info["status"] in (ReportStatus.FAILED, ReportStatus.CANCELLED):
+        response.update({field: status_info[field] for field in PARTIAL_PROGRESS_FIELDS if field in status_info})
+
+    # Sampled estimate until the exact report is available
+    if status_info.get("preview") and status_info["status"] != ReportStatus.COMPLETED:
+        response["preview"] = status_info["preview"]
+
     # If completed, include download link
     if status_info["status"] == ReportStatus.COMPLETED:
         response["download_url"] = f"/report_data/report_{report_id}.csv"
@@ -92,4 +141,124 @@ async def get_report_status(report_id: str):
             remaining_time = estimated_total_time * (1 - elapsed_ratio)
             response["estimated_completion_seconds"] = int(remaining_time)
 
-    return response
\ No newline at end of file
+    return response
+
+
+def to_epoch(value: Optional[datetime]) -> Optional[float]:
+    """Epoch seconds of a query datetime, naive datetimes are read as UTC"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+@router.get("/list_reports", tags=["Reports"], response_model=dict)
+async def list_reports(limit: int = Query(20, ge=1, le=200),
+                       status: Optional[ReportStatus] = None,
+                       since: Optional[datetime] = None,
+                       until: Optional[datetime] = None,
+                       cursor: Optional[str] = None):
+    """
+    List recent reports, newest first
+    filter by status and creation time (since/until)
+    pagination: pass next_cursor back as cursor until it is null,
+    a filtered page can hold fewer than limit reports (even none) and still have a next_cursor
+    reports are listed while their status is kept in Redis (24 hours)
+    """
+    try:
+        return await report_manager.list_reports(
+            limit=limit,
+            status=status.value if status else None,
+            since=to_epoch(since),
+            until=to_epoch(until),
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/statuses", tags=["Reports"], response_model=dict)
+async def get_report_statuses(report_id: list[str] = Query(...)):
+    """
+    Get the status of many reports in one round trip
+    ?report_id=...&report_id=...
+    unknown reports are returned as null
+    """
+    if len(report_id) > 500:
+        raise HTTPException(status_code=400, detail="At most 500 report ids per request")
+    statuses = await report_manager.get_report_statuses(report_id)
+    return {
+        "reports": dict(zip(report_id, statuses))
+    }
+
+
+@router.post("/cancel_report/{report_id}", tags=["Reports"], response_model=dict)
+async def cancel_report(report_id: str):
+    """
+    Request cancellation of a pending or processing report
+    the report stops between store batches and frees its workers
+    """
+    status_info = await report_manager.get_report_status(report_id)
+
+    if not status_info:
+        raise HTTPException(status_code=404, detail="Report not found")
+    if status_info["status"] in (ReportStatus.COMPLETED, ReportStatus.FAILED, ReportStatus.CANCELLED):
+        raise HTTPException(status_code=409, detail=f"Report is already {status_info['status']}")
+
+    await report_manager.request_cancel(report_id)
+    return {
+        "report_id": report_id,
+        "status": status_info["status"],
+        "message": "Cancellation requested. Use /reports/get_report/{report_id} to check progress."
+    }
+
+
+@router.get("/get_report/{report_id}/results", tags=["Reports"], response_model=dict)
+async def get_report_results(report_id: str,
+                             sort_by: str = "downtime_last_week",
+                             order: str = "desc",
+                             limit: int = Query(50, ge=1, le=1000),
+                             cursor: Optional[str] = None,
+                             min_value: Optional[float] = None,
+                             max_value: Optional[float] = None):
+    """
+    Query per-store rows of a completed report
+    sorted by any metric, filtered by min_value/max_value on that metric
+    top-N: first page with limit=N
+    pagination: pass next_cursor back as cursor
+    """
+    if sort_by not in REPORT_METRICS:
+        raise HTTPException(status_code=400, detail=f"sort_by must be one of {', '.join(REPORT_METRICS)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    if cursor is not None and not cursor.isdigit():
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if any(value is not None and not math.isfinite(value) for value in (min_value, max_value)):
+        raise HTTPException(status_code=400, detail="min_value and max_value must be finite numbers")
+
+    # rows outlive the status key (7 days vs 24 hours), only an unfinished report is refused
+    status_info = await report_manager.get_report_status(report_id)
+    if status_info and status_info["status"] != ReportStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Report is {status_info['status']}")
+
+    page = await report_manager.query_report_results(
+        report_id, sort_by,
+        descending=order == "desc",
+        limit=limit,
+        cursor=int(cursor or 0),
+        min_value=min_value,
+        max_value=max_value
+    )
+    if page is None:
+        if not status_info:
+            raise HTTPException(status_code=404, detail="Report not found")
+        # completed without any store rows
+        page = {"total": 0, "rows": [], "next_cursor": None}
+
+    return {
+        "report_id": report_id,
+        "sort_by": sort_by,
+        "order": order,
+        **page
+    }
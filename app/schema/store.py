@@ -14,6 +14,13 @@ class StorePollingCreate(BaseModel):
     class Config:
         from_attributes = True
 
+class StorePollingIngest(StorePollingCreate):
+    """
+    poll pushed by the pollers
+    store_id is required, a missing one must not create a new store
+    """
+    store_id: uuid.UUID
+
 class StoreTimeZoneCreate(BaseModel):
     """
     create store time zone
@@ -4,9 +4,9 @@ from datetime import datetime
 
 from pytz import timezone
 
-from app.models.report import StoreReportsStatus
-
 async def generate_unique_report_id():
+    from app.models.report import StoreReportsStatus
+
     report_id = uuid.uuid4()
     # check if generating report is is already exist
     is_report_id = await StoreReportsStatus.get_or_none(report_id=report_id)
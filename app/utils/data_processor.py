@@ -1,25 +1,112 @@
+import asyncio
 import os
 import time
-from datetime import datetime, timedelta, timezone, date
-from multiprocessing import cpu_count, Pool
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from multiprocessing import cpu_count, get_all_start_methods, get_context
 from typing import Any
 
 import pandas as pd
 from pandas import DataFrame
 from tortoise.expressions import Q
 
+from app.db_conn.db_config import REPORT_DEADLINE_SECONDS, REPORT_MAX_WORKERS
 from app.db_conn.redis_confg import ReportStatus
 from app.models.business_menu import StoreMenuHour
-from app.models.stores import StorePolls, StoreTimeZone
+from app.models.stores import StorePolls, StoreTimeZone, StoreStatusInterval
 from app.models.report import StoreReportsStatus, store_report_status
-from app.utils.common import convert_to_business_timezone, strftime
+from app.utils.poll_compaction import expand_status_intervals
+from app.utils.report_management import REPORT_METRICS
+from app.utils.report_worker import build_report_frames, process_calculation_data
+
+
+@lru_cache(maxsize=None)
+def get_pool_context():
+    """
+    Multiprocessing context of the report pools, chosen explicitly instead of the platform default
+    forkserver where available: the server preloads app.utils.report_worker once,
+    workers of every later pool fork from it warm; spawn elsewhere
+    never fork, it would copy the API process with its event loop and open connections
+    caveat: with forkserver and spawn alike, every worker also imports the parent's __main__
+    (as __mp_main__) from its path or module name, so a worker imports whatever the entry point imports:
+    the console script under `uvicorn main:app`, the whole app graph under `python main.py`
+    or `python -m benchmarks.load_reports`; the worker stays slim only under a light entry point
+    """
+    if "forkserver" in get_all_start_methods():
+        context = get_context("forkserver")
+        context.set_forkserver_preload(["app.utils.report_worker"])
+        return context
+    return get_context("spawn")
+
+
+class ReportCancelled(Exception):
+    """
+    Raised when a cancel was requested for the running report
+    """
+
+
+class ReportDeadlineExceeded(Exception):
+    """
+    Raised when the running report is past its deadline
+    """
 
 
 class BusinessAnalyzer:
-    def __init__(self, report_id):
+    def __init__(self, report_id, deadline_seconds: int = None, max_workers: int = None,
+                 batch_size: int = 200):
         self.report_id = report_id
         # self.report_manager = report_manager
+        # per-report deadline, can only be shorter than the configured one
+        self.deadline_seconds = min(deadline_seconds or REPORT_DEADLINE_SECONDS, REPORT_DEADLINE_SECONDS)
+        # cores a single report may use
+        self.max_workers = max(1, min(max_workers or REPORT_MAX_WORKERS, REPORT_MAX_WORKERS, cpu_count()))
+        # stores per pool submission, cancellation is checked between batches
+        self.batch_size = batch_size
+
+        self.started_at = None
+        self.stores_processed = 0
+        self.windows_completed = []
+
+    def partial_progress(self) -> dict:
+        return {
+            "stores_processed": self.stores_processed,
+            "windows_completed": list(self.windows_completed),
+            "elapsed_seconds": round(time.perf_counter() - self.started_at, 2) if self.started_at else 0
+        }
 
+    async def check_budget(self, report_manager):
+        """
+        Stop the report when it was cancelled or ran past its deadline
+        """
+        if await report_manager.is_cancelled(self.report_id):
+            raise ReportCancelled()
+        if time.perf_counter() - self.started_at > self.deadline_seconds:
+            raise ReportDeadlineExceeded(f"Report deadline of {self.deadline_seconds}s exceeded")
+
+    async def wait_for_result(self, async_result, report_manager):
+        """
+        Wait for a pool result without blocking the event loop
+        the budget is re-checked every poll, so a cancelled report stops within a poll interval;
+        leaving the pool context terminates the workers
+        """
+        while not async_result.ready():
+            await asyncio.sleep(0.2)
+            await self.check_budget(report_manager)
+        return async_result.get()
+
+    async def run_store_batches(self, pool, report_manager, tasks: list) -> list:
+        """
+        Submit store calculations to the pool batch by batch
+        """
+        results = []
+        for i in range(0, len(tasks), self.batch_size):
+            await self.check_budget(report_manager)
+            batch = tasks[i:i + self.batch_size]
+            results.extend(await self.wait_for_result(
+                pool.starmap_async(process_calculation_data, batch), report_manager
+            ))
+            self.stores_processed += len(batch)
+        return results
 
     # main function
     async def main(self):
@@ -27,11 +114,12 @@ class BusinessAnalyzer:
         Main report generation method with Redis status updates
         :return:
         """
-        try:
-            from app.routes.report import report_manager
+        from app.routes.report import report_manager
 
+        try:
             # Update status to processing
-            start_time = time.perf_counter()
+            start_time = self.started_at = time.perf_counter()
+            await self.check_budget(report_manager)
             await report_manager.update_report_status(
                 self.report_id,
                 ReportStatus.PROCESSING,
@@ -39,26 +127,30 @@ class BusinessAnalyzer:
                 message="Starting report generation"
             )
 
-            report_df = pd.DataFrame()
-            for window, day_counter in {'last_hour': 1, 'last_day': 1, 'last_week': 6}.items():
-                # start_time = time.perf_counter()
-                df_polls, df_business_hours, df_timezones = await self.preprocess_model_data(window)
-                end_time = time.perf_counter()
-                elapsed_time = end_time - start_time
-                # progress status update, Redis: Processing
-                await report_manager.update_report_status(
-                    self.report_id, ReportStatus.PROCESSING, elapsed_time, "Processing time windows"
-                )
-
-                for _ in range(day_counter):
-                    num_processes = cpu_count()  # Number of CPU cores available
-                    if not df_polls.empty:
-                        store_ids = df_polls['store_id'].unique()
-
-                        with Pool(processes=num_processes) as pool:
-                            results = pool.starmap(self.process_calculation_data,
-                                                   [(store_id, df_polls, df_business_hours, window) for store_id in
-                                                    store_ids])
+            report_results = []
+            # one pool per report, capped at max_workers
+            with get_pool_context().Pool(processes=self.max_workers) as pool:
+                for window, day_counter in {'last_hour': 1, 'last_day': 1, 'last_week': 6}.items():
+                    # start_time = time.perf_counter()
+                    await self.check_budget(report_manager)
+                    model_data = await self.fetch_model_data(window)
+                    await self.check_budget(report_manager)
+                    # timezone conversion is CPU heavy: run it in the pool, where it can be terminated
+                    df_polls, df_business_hours, df_timezones = await self.wait_for_result(
+                        pool.apply_async(build_report_frames, model_data), report_manager
+                    )
+                    end_time = time.perf_counter()
+                    elapsed_time = end_time - start_time
+                    # progress status update, Redis: Processing
+                    await report_manager.update_report_status(
+                        self.report_id, ReportStatus.PROCESSING, elapsed_time, "Processing time windows"
+                    )
+
+                    for _ in range(day_counter):
+                        if not df_polls.empty:
+                            tasks = await asyncio.to_thread(self.build_store_tasks, df_polls, df_business_hours,
+                                                            window)
+                            results = await self.run_store_batches(pool, report_manager, tasks)
 
                             end_time = time.perf_counter()
                             elapsed_time = end_time - start_time
@@ -67,12 +159,17 @@ class BusinessAnalyzer:
                                 self.report_id, ReportStatus.PROCESSING, elapsed_time, "Processing time windows"
                             )
 
-                        # Update the report dataframe from the results
-                        report_df = pd.concat([report_df, pd.DataFrame(results)], ignore_index=True)
-                    else:
-                        continue
-            # Store completed report
-            await report_manager.store_report_data(self.report_id, self.report_id)
+                            # Collect the results, the report dataframe is built once at the end
+                            report_results.extend(results)
+                        else:
+                            continue
+                    self.windows_completed.append(window)
+
+            # Store completed report, one row per store
+            # pandas work stays off the event loop
+            report_df = await asyncio.to_thread(pd.DataFrame, report_results)
+            report_rows = await asyncio.to_thread(self.build_report_rows, report_df)
+            await report_manager.store_report_data(self.report_id, report_rows)
 
             if not os.path.exists('report_data'):
                 os.makedirs('report_data')
@@ -81,7 +178,7 @@ class BusinessAnalyzer:
             # Save the report to a CSV file
             # in 3 tine window sizes
             report_file_path = f"report_data/report_{self.report_id}.csv"
-            report_df.to_csv(report_file_path, index=False)
+            await asyncio.to_thread(report_df.to_csv, report_file_path, index=False)
 
             end_time = time.perf_counter()
             elapsed_time = end_time - start_time
@@ -93,32 +190,96 @@ class BusinessAnalyzer:
             )
 
             # Update the report status to complete
-            # filter existing report
-            # if exist change status save
-            # else: create new
-            report_inst = await StoreReportsStatus.filter(report_id=self.report_id).exists()
-            if not report_inst:
-                report_data = store_report_status(
-                    report_id=self.report_id,
-                    report_status=True
-                )
-                await StoreReportsStatus.create(**report_data.dict())
-            else:
-                store_report_status.status = True
+            await self.record_completion(succeeded=True)
+        except ReportCancelled:
+            await report_manager.update_report_status(
+                self.report_id,
+                ReportStatus.CANCELLED,
+                message="Report generation cancelled",
+                details=self.partial_progress()
+            )
+            await self.record_completion(succeeded=False)
+            print(f"Report {self.report_id} cancelled")
+        except ReportDeadlineExceeded as e:
+            await report_manager.update_report_status(
+                self.report_id,
+                ReportStatus.FAILED,
+                message=f"Report generation failed: {str(e)}",
+                details=self.partial_progress()
+            )
+            await self.record_completion(succeeded=False)
+            print(f"Report {self.report_id} failed: {str(e)}")
         except Exception as e:
             # Handle errors
             await report_manager.update_report_status(
                 self.report_id,
                 ReportStatus.FAILED,
-                message=f"Report generation failed: {str(e)}"
+                message=f"Report generation failed: {str(e)}",
+                details=self.partial_progress()
             )
+            await self.record_completion(succeeded=False)
             # Log error details
             print(f"Report {self.report_id} failed: {str(e)}")
 
-    async def preprocess_model_data(self, report_window) -> tuple[DataFrame, DataFrame | Any, DataFrame]:
+    async def record_completion(self, succeeded: bool):
+        """
+        Mirror the final state of the report on StoreReportsStatus
+        filter existing report: update status, completed_at, duration
+        else: create new
+        """
+        try:
+            completed_at = datetime.now(timezone.utc)
+            duration_seconds = round(time.perf_counter() - self.started_at, 2) if self.started_at else None
+            updated = await StoreReportsStatus.filter(report_id=self.report_id).update(
+                status=succeeded,
+                completed_at=completed_at,
+                duration_seconds=duration_seconds
+            )
+            if not updated:
+                report_data = store_report_status(
+                    report_id=self.report_id,
+                    status=succeeded,
+                    completed_at=completed_at,
+                    duration_seconds=duration_seconds
+                )
+                await StoreReportsStatus.create(**report_data.dict())
+        except Exception as e:
+            print(f"Report {self.report_id} status could not be saved: {str(e)}")
+
+    @staticmethod
+    def build_store_tasks(df_polls: DataFrame, df_business_hours: DataFrame, reporting_window: str) -> list:
+        """
+        Pool tasks of one window, each worker is shipped only the rows of its own store
+        """
+        store_hours = dict(tuple(df_business_hours.groupby('store_id'))) if not df_business_hours.empty else {}
+        no_hours = df_business_hours.reindex(
+            columns=['store_id', 'day_of_week', 'start_time_local', 'end_time_local']
+        ).iloc[0:0]
+        return [
+            (store_id, df_store_polls, store_hours.get(store_id, no_hours), reporting_window)
+            for store_id, df_store_polls in df_polls.groupby('store_id', sort=False)
+        ]
+
+    @staticmethod
+    def build_report_rows(report_df: DataFrame) -> list[dict]:
+        """
+        Merge the per-window results into one row per store
+        each window contributes its own uptime/downtime columns
+        """
+        if report_df.empty:
+            return []
+
+        df_rows = report_df.reindex(columns=['store_id', *REPORT_METRICS])
+        df_rows[list(REPORT_METRICS)] = df_rows[list(REPORT_METRICS)].apply(pd.to_numeric, errors='coerce')
+        df_rows = df_rows.groupby('store_id', as_index=False).first().fillna(0)
+        return [{**row, 'store_id': str(row['store_id'])} for row in df_rows.to_dict('records')]
+
+    async def fetch_model_data(self, report_window, store_ids: list = None) -> tuple[list, list, list]:
         # cleaned filter for each time windows
         # polls and business hours
         # time window in UTC
+        # store_ids: restrict to these stores, all stores when None
+        store_filter = {"store_id__in": store_ids} if store_ids is not None else {}
         now_utc = datetime.now(timezone.utc)  # Current datetime UTC
 
         if report_window == 'last_hour':
@@ -143,94 +304,35 @@ class BusinessAnalyzer:
 
         # Fetch data from the app models
         df_store_data = await (StorePolls.all()
+                               .filter(**store_filter)
                                .filter(Q(timestamp_utc__gte=start_utc) &
                                        Q(timestamp_utc__lte=stop_utc))
                                .values("store_id", "timestamp_utc", "status"))
+        # compacted history: runs of identical status, split per UTC day, inside the window
+        df_interval_data = await (StoreStatusInterval.all()
+                                  .filter(**store_filter)
+                                  .filter(Q(start_utc__gte=start_utc) &
+                                          Q(end_utc__lte=stop_utc))
+                                  .values("store_id", "start_utc", "end_utc", "status"))
+        df_store_data = list(df_store_data) + expand_status_intervals(df_interval_data)
 
         day_lookup = [days] if isinstance(days, int) else list(range(7))
         df_business_hours_data = await (StoreMenuHour.all()
-                                        .filter(day_of_week__in=day_lookup)
+                                        .filter(day_of_week__in=day_lookup, **store_filter)
                                         .values("store_id", "day_of_week", "start_time_local",
                                                 "end_time_local"))
-        df_timezones_data = await  StoreTimeZone.all().values("store_id", "timezone_str")
-
-        # Convert to pandas DataFrames
-        df_status = pd.DataFrame(df_store_data)
-        df_business_hours = pd.DataFrame(df_business_hours_data)
-        df_timezones = pd.DataFrame(df_timezones_data)
-
-        if not df_timezones.empty:
-            # Filter out rows with missing store_id in df_timezones
-            if not df_business_hours.empty:
-                df_business_hours = df_business_hours[df_business_hours['store_id'].isin(df_timezones['store_id'])]
-                # df_business_hours = sorted(df_business_hours['store_id'].unique())
-                # df_business_hours = pd.DataFrame({'store_id': df_business_hours})
-
-            # Convert timestamps into business timezone datetime objects
-            if not df_status.empty:
-                df_status['timestamp_local'] = df_status.apply(convert_to_business_timezone, args=(df_timezones,),
-                                                               axis=1)
-                df_status = df_status.sort_values(by='timestamp_local', ascending=False)
-
-        return df_status, df_business_hours, df_timezones
-
-    def process_calculation_data(self, store_id, df_polls, df_business_hours, reporting_window):
-        df_store_polls = df_polls[df_polls['store_id'] == store_id]
-        df_store_hours = df_business_hours[df_business_hours['store_id'] == store_id]
-
-        if df_store_hours.empty:
-            return {
-                'store_id': store_id,
-                **{f'{metric}_{window}': 0 for metric in ['uptime', 'downtime'] for window in
-                   ['last_hour', 'last_day', 'last_week']}
-            }
-
-        class GetTimeWindows:
-            def __init__(self, df_store_hour):
-                # start window time from store hours
-                # start time: min (start time local for each day)
-                self.start_window_time = df_store_hour['start_time_local'].min()
-
-                # stop window time from store hours
-                # stop time: max(stop time local for each day)
-                self.stop_window_time = df_store_hour['end_time_local'].max()
-
-        get_time_windows = GetTimeWindows(df_store_hours)
-
-        start_window_time = get_time_windows.start_window_time
-        stop_window_time = get_time_windows.stop_window_time
-
-        intervals = []
-        prev_time = strftime(start_window_time)
-        prev_status = False  # inactive
-
-        for _, row in df_store_polls.iterrows():
-            current_time = datetime.fromisoformat(row['timestamp_local'])
-            t_as_datetime = datetime.combine(current_time.date(), prev_time)
-            duration = ((current_time - t_as_datetime).total_seconds() / 60)  # in minutes
-            intervals.append((duration, prev_status))
-            prev_time = current_time.time()
-            prev_status = row['status']
-
-        stop_window = strftime(stop_window_time)
-        # t_as_datetime = datetime.combine(prev_time.date(), stop_window)
-        if prev_time < stop_window:
-            prev_time = datetime.combine(date.min, prev_time)
-            stop_window = datetime.combine(date.min, stop_window)
-            duration = (stop_window - prev_time).total_seconds() / 60
-            intervals.append((duration, prev_status))
-
-        uptime = round(sum(d / 60 for d, s in intervals if s), 2) if (
-                reporting_window in ['last_day', 'last_week']
-        ) else round(sum(d for d, s in intervals if s), 2)
-
-        downtime = round(sum(d / 60 for d, s in intervals if not s), 2) if (
-                reporting_window in ['last_day', 'last_week']
-        ) else round(sum(d for d, s in intervals if not s), 2)
-
-        # return time window uptime, downtime
-        return {
-            'store_id': store_id,
-            f"uptime_{reporting_window}": f"{uptime}",
-            f"downtime_{reporting_window}": f"{downtime}"
-        }
+        df_timezones_data = await  StoreTimeZone.all().filter(**store_filter).values("store_id", "timezone_str")
+
+        return df_store_data, df_business_hours_data, df_timezones_data
+
+    async def preprocess_model_data(self, report_window,
+                                    store_ids: list = None) -> tuple[DataFrame, DataFrame | Any, DataFrame]:
+        """
+        Fetch and build the report frames of one window
+        frames are built in a thread, off the event loop
+        """
+        model_data = await self.fetch_model_data(report_window, store_ids)
+        return await asyncio.to_thread(build_report_frames, *model_data)
+
+    # store calculation runs in the pool workers, see app.utils.report_worker
+    process_calculation_data = staticmethod(process_calculation_data)
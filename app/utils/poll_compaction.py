@@ -0,0 +1,99 @@
+from datetime import date, datetime, timedelta, timezone
+
+from tortoise.transactions import in_transaction
+
+from app.models.stores import StorePolls, StoreStatusInterval
+
+
+def utc_day(timestamp: datetime) -> date:
+    return timestamp.astimezone(timezone.utc).date() if timestamp.tzinfo else timestamp.date()
+
+
+def collapse_polls(polls) -> list[dict]:
+    """
+    Collapse polls ordered by (store_id, timestamp_utc) into runs of identical status
+    runs are split at UTC midnight, so a day-aligned report window never cuts inside a run
+    :param polls: iterable of (store_id, timestamp_utc, status)
+    :return: interval rows (store_id, start_utc, end_utc, status), start/end are the first/last poll
+    """
+    intervals = []
+    current = None
+    for store_id, timestamp_utc, status in polls:
+        if (current and current["store_id"] == store_id and current["status"] == status
+                and utc_day(current["start_utc"]) == utc_day(timestamp_utc)):
+            current["end_utc"] = timestamp_utc
+            continue
+        current = {
+            "store_id": store_id,
+            "start_utc": timestamp_utc,
+            "end_utc": timestamp_utc,
+            "status": status
+        }
+        intervals.append(current)
+    return intervals
+
+
+def expand_status_intervals(intervals) -> list[dict]:
+    """
+    Turn intervals back into poll rows for the report engine
+    each run becomes its first and last real poll; the engine sums time-of-day differences
+    between consecutive polls, so the polls inside a run cancel out
+    """
+    polls = []
+    for interval in intervals:
+        polls.append({"store_id": interval["store_id"], "timestamp_utc": interval["start_utc"],
+                      "status": interval["status"]})
+        if interval["end_utc"] != interval["start_utc"]:
+            polls.append({"store_id": interval["store_id"], "timestamp_utc": interval["end_utc"],
+                          "status": interval["status"]})
+    return polls
+
+
+async def compact_store_polls(older_than: timedelta, store_chunk: int = 500, delete_batch: int = 5000) -> dict:
+    """
+    Compact polls older than `older_than` into store_status_interval and delete them
+    the cutoff is floored to UTC midnight and is at least a day old: last_week is day-aligned,
+    last_hour and last_day only read raw polls, so no report window ends inside a stored run
+    stores are compacted in chunks, each chunk in its own transaction
+    only the polls read into intervals are deleted, by id
+    :return: compaction stats
+    """
+    if older_than < timedelta(days=1):
+        raise ValueError("Polls younger than a day are read by the last_day window and cannot be compacted")
+    cutoff = (datetime.now(timezone.utc) - older_than).replace(hour=0, minute=0, second=0, microsecond=0)
+    store_ids = await (StorePolls.filter(timestamp_utc__lt=cutoff)
+                       .distinct()
+                       .values_list("store_id", flat=True))
+
+    polls_compacted, intervals_created = 0, 0
+    for i in range(0, len(store_ids), store_chunk):
+        chunk = store_ids[i:i + store_chunk]
+        async with in_transaction() as conn:
+            polls = await (StorePolls.filter(store_id__in=chunk, timestamp_utc__lt=cutoff)
+                           .using_db(conn)
+                           .order_by("store_id", "timestamp_utc")
+                           .values_list("id", "store_id", "timestamp_utc", "status"))
+            intervals = collapse_polls(poll[1:] for poll in polls)
+
+            await StoreStatusInterval.bulk_create(
+                [StoreStatusInterval(**interval) for interval in intervals],
+                batch_size=1000,
+                using_db=conn
+            )
+            # delete by id what was read, a backfilled poll committed since the read stays for the next run
+            poll_ids = [poll[0] for poll in polls]
+            for j in range(0, len(poll_ids), delete_batch):
+                await (StorePolls.filter(id__in=poll_ids[j:j + delete_batch])
+                       .using_db(conn)
+                       .delete())
+
+        polls_compacted += len(polls)
+        intervals_created += len(intervals)
+
+    return {
+        "cutoff_utc": cutoff.isoformat(),
+        "stores": len(store_ids),
+        "polls_compacted": polls_compacted,
+        "intervals_created": intervals_created,
+        "average_run_length": round(polls_compacted / intervals_created, 2) if intervals_created else 0
+    }
@@ -0,0 +1,167 @@
+import asyncio
+import time
+from collections import deque
+from typing import Optional
+
+from tortoise.transactions import in_transaction
+
+from app.models.stores import StorePolls
+
+
+class PollBufferFull(Exception):
+    """
+    Raised when a batch does not fit in the ingestion buffer
+    """
+    def __init__(self, buffered: int, capacity: int):
+        self.buffered = buffered
+        self.capacity = capacity
+        super().__init__(f"Poll buffer full ({buffered}/{capacity})")
+
+
+class PollBuffer:
+    """
+    In-memory micro-batching buffer for store polls
+    polls are appended by the ingestion route and flushed to store_status
+    with multi-row INSERTs once flush_size rows are buffered
+    or flush_interval seconds have passed, whichever comes first
+    """
+    def __init__(self, max_buffer: int = 50000, flush_size: int = 5000,
+                 flush_interval: float = 2.0, batch_size: int = 1000):
+        self.max_buffer = max_buffer
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size  # rows per INSERT statement
+
+        self._buffer: list[dict] = []
+        self._in_flight = 0  # rows taken by a running flush, still count against max_buffer
+        self._flush_lock = asyncio.Lock()
+        self._flush_event = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        # metrics
+        self._started_at = time.monotonic()
+        self._accepted_total = 0
+        self._rejected_total = 0
+        self._flushed_total = 0
+        self._flush_count = 0
+        self._flush_errors = 0
+        self._last_flush_at: Optional[float] = None
+        self._accept_window = deque()  # (monotonic time, rows) over the last rate_window seconds
+        self._flush_latencies = deque(maxlen=256)  # seconds, most recent flushes
+        self.rate_window = 60
+
+    async def start(self):
+        """Start the background flusher"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background flusher and drain what is left in the buffer"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def add(self, polls: list[dict]) -> int:
+        """
+        Append validated polls to the buffer
+        the whole batch is rejected when it does not fit, so callers can retry it as is
+        rows of a running flush count as buffered: if the flush fails they come back
+        :return: number of buffered rows after the append
+        """
+        buffered = len(self._buffer) + self._in_flight
+        if buffered + len(polls) > self.max_buffer:
+            self._rejected_total += len(polls)
+            raise PollBufferFull(buffered, self.max_buffer)
+
+        self._buffer.extend(polls)
+        self._accepted_total += len(polls)
+        now = time.monotonic()
+        self._accept_window.append((now, len(polls)))
+
+        if len(self._buffer) >= self.flush_size:
+            self._flush_event.set()
+        return len(self._buffer) + self._in_flight
+
+    async def flush(self) -> int:
+        """
+        Write buffered polls to store_status
+        all INSERTs of a flush share one transaction, so a failed flush writes nothing
+        and its rows are re-queued; a failing database fills the buffer
+        and the ingestion route starts answering 429
+        :return: number of rows written
+        """
+        async with self._flush_lock:
+            if not self._buffer:
+                return 0
+
+            batch, self._buffer = self._buffer, []
+            self._in_flight = len(batch)
+            start_time = time.perf_counter()
+            try:
+                async with in_transaction() as conn:
+                    await StorePolls.bulk_create(
+                        [StorePolls(**poll) for poll in batch],
+                        batch_size=self.batch_size,
+                        using_db=conn
+                    )
+            except Exception as e:
+                self._flush_errors += 1
+                self._buffer = batch + self._buffer
+                print(f"Poll flush of {len(batch)} rows failed: {str(e)}")
+                return 0
+            finally:
+                self._in_flight = 0
+
+            self._flush_latencies.append(time.perf_counter() - start_time)
+            self._flushed_total += len(batch)
+            self._flush_count += 1
+            self._last_flush_at = time.time()
+            return len(batch)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_event.clear()
+            await self.flush()
+
+    def metrics(self) -> dict:
+        """Ingestion rate and flush latency metrics"""
+        now = time.monotonic()
+        while self._accept_window and now - self._accept_window[0][0] > self.rate_window:
+            self._accept_window.popleft()
+
+        latencies = sorted(self._flush_latencies)
+        uptime = now - self._started_at
+
+        def percentile(p):
+            if not latencies:
+                return None
+            index = min(len(latencies) - 1, int(round(p / 100 * (len(latencies) - 1))))
+            return round(latencies[index] * 1000, 2)
+
+        return {
+            "buffered": len(self._buffer) + self._in_flight,
+            "buffer_capacity": self.max_buffer,
+            "accepted_total": self._accepted_total,
+            "rejected_total": self._rejected_total,
+            "flushed_total": self._flushed_total,
+            "flush_count": self._flush_count,
+            "flush_errors": self._flush_errors,
+            "ingest_rate_per_sec": round(sum(n for _, n in self._accept_window) / self.rate_window, 2),
+            "ingest_rate_per_sec_lifetime": round(self._accepted_total / uptime, 2) if uptime > 0 else 0,
+            "flush_latency_ms": {
+                "last": round(self._flush_latencies[-1] * 1000, 2) if self._flush_latencies else None,
+                "p50": percentile(50),
+                "p95": percentile(95),
+                "max": round(latencies[-1] * 1000, 2) if latencies else None,
+            },
+            "last_flush_at": self._last_flush_at,
+        }
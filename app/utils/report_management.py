@@ -1,13 +1,27 @@
 import json
 import uuid
+import time
 from datetime import datetime
 from typing import Optional
 
-from app.db_conn.redis_confg import REPORT_STATUS_KEY, ReportStatus, REPORT_DATA_KEY
+from app.db_conn.redis_confg import REPORT_STATUS_KEY, ReportStatus, REPORT_DATA_KEY, REPORT_RANK_KEY, \
+    REPORT_CANCEL_KEY, REPORT_INDEX_KEY
+
+# statuses after which a report no longer changes
+FINAL_REPORT_STATUSES = (ReportStatus.COMPLETED, ReportStatus.FAILED, ReportStatus.CANCELLED)
+
+# per-store report metrics, each one is a sortable column of the report results
+REPORT_METRICS = tuple(
+    f"{metric}_{window}" for metric in ["uptime", "downtime"] for window in ["last_hour", "last_day", "last_week"]
+)
+
+# progress a stopped report reached, kept on the status of failed and cancelled reports
+PARTIAL_PROGRESS_FIELDS = ("stores_processed", "windows_completed", "elapsed_seconds")
 
 
 class ReportManager:
-    def __init__(self, redis_client):
+    def __init__(self, redis_client=None):
+        # bound in the app lifespan when not given
         self.redis = redis_client
         self.status_ttl = 86400  # 24 hours
         self.data_ttl = 604800  # 7 days
@@ -60,18 +74,24 @@ class ReportManager:
         }
 
         # Store in Redis with TTL
+        # index by creation time, entries older than the status TTL have no status left to read
         key = REPORT_STATUS_KEY.format(report_id=report_id_str)
         value = json.dumps(report_info)
-        self.redis.setex(
+        now = time.time()
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.setex(
             key,
             self.status_ttl,
             value
         )
+        pipe.zadd(REPORT_INDEX_KEY, {report_id_str: now})
+        pipe.zremrangebyscore(REPORT_INDEX_KEY, "-inf", now - self.status_ttl)
+        pipe.execute()
 
         return report_info
 
     async def update_report_status(self, report_id, status: ReportStatus,
-                                   progress: int = None, message: str = None):
+                                   progress: int = None, message: str = None, details: dict = None):
         """Update report status in Redis"""
         report_id_str = str(report_id) if isinstance(report_id, uuid.UUID) else report_id
         key = REPORT_STATUS_KEY.format(report_id=report_id_str)
@@ -87,19 +107,117 @@ class ReportManager:
                 report_info["progress"] = progress
             if message is not None:
                 report_info["message"] = message
-
+            if details is not None:
+                report_info.update(details)
+            if status in FINAL_REPORT_STATUSES:
+                completed_at = datetime.utcnow()
+                report_info["completed_at"] = completed_at.isoformat()
+                report_info["duration_seconds"] = round(
+                    (completed_at - datetime.fromisoformat(report_info["created_at"])).total_seconds(), 2
+                )
 
             value = json.dumps(report_info)
             self.redis.setex(key, self.status_ttl, value)
 
-    async def store_report_data(self, report_id, data):
-        """Store completed report data"""
+    async def update_report_details(self, report_id, details: dict):
+        """Merge fields into the report status in Redis, the status itself is left as is"""
         report_id_str = str(report_id) if isinstance(report_id, uuid.UUID) else report_id
-        self.redis.setex(
-            REPORT_DATA_KEY.format(report_id=report_id_str),
-            self.data_ttl,
-            self._serialize_data(data)
-        )
+        key = REPORT_STATUS_KEY.format(report_id=report_id_str)
+
+        existing_data = self.redis.get(key)
+        if existing_data:
+            report_info = self._deserialize_data(existing_data)
+            report_info.update(details)
+            ttl = self.redis.ttl(key)
+            self.redis.setex(key, ttl if ttl and ttl > 0 else self.status_ttl, json.dumps(report_info))
+
+    async def get_report_statuses(self, report_ids: list) -> list[Optional[dict]]:
+        """Get many report statuses with a single MGET, None for unknown reports"""
+        if not report_ids:
+            return []
+        keys = [REPORT_STATUS_KEY.format(report_id=str(report_id)) for report_id in report_ids]
+        return [self._deserialize_data(data) for data in self.redis.mget(keys)]
+
+    async def list_reports(self, limit: int = 20, status: str = None, since: float = None,
+                           until: float = None, cursor: str = None, max_scan: int = 1000) -> dict:
+        """
+        List reports newest first from the report index
+        since/until are epoch seconds, cursor is the report_id the previous page stopped at
+        the index is ordered by (created_at, report_id), pages start at the rank of the cursor,
+        so reports created in the same instant are neither skipped nor repeated
+        a page scans at most max_scan index entries: with a status filter it can come back short,
+        next_cursor continues the scan where it stopped
+        """
+        if cursor is not None:
+            rank = self.redis.zrevrank(REPORT_INDEX_KEY, cursor)
+            if rank is None:
+                raise ValueError("Unknown or expired cursor")
+            start = rank + 1
+        elif until is not None:
+            start = self.redis.zcount(REPORT_INDEX_KEY, f"({until}", "+inf")
+        else:
+            start = 0
+
+        reports, scanned, last_scanned = [], 0, None
+        has_more = True
+        chunk_size = limit if status is None else limit * 4
+        while has_more and len(reports) < limit and scanned < max_scan:
+            num = min(chunk_size, max_scan - scanned)
+            entries = self.redis.zrevrange(REPORT_INDEX_KEY, start, start + num - 1, withscores=True)
+            start += num
+            has_more = len(entries) == num
+            if since is not None and entries and entries[-1][1] < since:
+                entries = [(report_id, created_ts) for report_id, created_ts in entries if created_ts >= since]
+                has_more = False
+
+            statuses = await self.get_report_statuses([report_id for report_id, _ in entries])
+            for position, ((report_id, _), status_info) in enumerate(zip(entries, statuses)):
+                scanned += 1
+                last_scanned = report_id
+                if status_info and (status is None or status_info["status"] == status):
+                    reports.append(status_info)
+                    if len(reports) == limit:
+                        has_more = has_more or position < len(entries) - 1
+                        break
+
+        return {
+            "reports": reports,
+            "next_cursor": last_scanned if has_more else None
+        }
+
+    async def request_cancel(self, report_id):
+        """Flag a report for cancellation, workers pick it up between store batches"""
+        report_id_str = str(report_id) if isinstance(report_id, uuid.UUID) else report_id
+        self.redis.setex(REPORT_CANCEL_KEY.format(report_id=report_id_str), self.status_ttl, 1)
+
+    async def is_cancelled(self, report_id) -> bool:
+        """Check the cancellation flag of a report"""
+        report_id_str = str(report_id) if isinstance(report_id, uuid.UUID) else report_id
+        return bool(self.redis.exists(REPORT_CANCEL_KEY.format(report_id=report_id_str)))
+
+    async def store_report_data(self, report_id, rows: list[dict], chunk_size: int = 1000):
+        """
+        Store completed report rows
+        rows go into a hash keyed by store_id and every metric into a sorted set,
+        so results can be paged, sorted and filtered without loading the whole report
+        """
+        report_id_str = str(report_id) if isinstance(report_id, uuid.UUID) else report_id
+        data_key = REPORT_DATA_KEY.format(report_id=report_id_str)
+        rank_keys = {metric: REPORT_RANK_KEY.format(report_id=report_id_str, metric=metric)
+                     for metric in REPORT_METRICS}
+
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.delete(data_key, *rank_keys.values())
+        for i in range(0, len(rows), chunk_size):
+            chunk = rows[i:i + chunk_size]
+            pipe.hset(data_key, mapping={str(row["store_id"]): self._serialize_data(row) for row in chunk})
+            for metric, rank_key in rank_keys.items():
+                pipe.zadd(rank_key, {str(row["store_id"]): float(row.get(metric) or 0) for row in chunk})
+            pipe.execute()
+
+        for key in [data_key, *rank_keys.values()]:
+            pipe.expire(key, self.data_ttl)
+        pipe.execute()
 
     async def get_report_status(self, report_id) -> Optional[dict]:
         """Get report status from Redis"""
@@ -109,8 +227,56 @@ class ReportManager:
         return self._deserialize_data(data)
 
     async def get_report_data(self, report_id) -> Optional[dict]:
-        """Get completed report data"""
+        """Get completed report data, keyed by store_id"""
         report_id_str = str(report_id) if isinstance(report_id, uuid.UUID) else report_id
         key = REPORT_DATA_KEY.format(report_id=report_id_str)
-        data = self.redis.get(key)
-        return self._deserialize_data(data)
\ No newline at end of file
+        data = self.redis.hgetall(key)
+        return {store_id: self._deserialize_data(row) for store_id, row in data.items()} or None
+
+    async def query_report_results(self, report_id, sort_by: str, descending: bool = True, limit: int = 50,
+                                   cursor: int = 0, min_value: float = None,
+                                   max_value: float = None) -> Optional[dict]:
+        """
+        Page through report rows ordered by one metric
+        thresholds are turned into rank bounds with ZCOUNT and the page is read by rank,
+        so every page costs O(log N + limit) whatever its depth
+        the cursor is the absolute rank of the next row, report rows never change once stored
+        """
+        report_id_str = str(report_id) if isinstance(report_id, uuid.UUID) else report_id
+        rank_key = REPORT_RANK_KEY.format(report_id=report_id_str, metric=sort_by)
+        data_key = REPORT_DATA_KEY.format(report_id=report_id_str)
+
+        low = "-inf" if min_value is None else min_value
+        high = "+inf" if max_value is None else max_value
+
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.exists(rank_key)
+        pipe.zcount(rank_key, low, high)
+        # rows ranked ahead of the threshold window in the requested order
+        if descending and max_value is not None:
+            pipe.zcount(rank_key, f"({max_value}", "+inf")
+        elif not descending and min_value is not None:
+            pipe.zcount(rank_key, "-inf", f"({min_value}")
+        exists, matched, *ahead = pipe.execute()
+        if not exists:
+            return None
+
+        first = ahead[0] if ahead else 0
+        end = first + matched  # exclusive
+        start = first + cursor
+        stop = min(end, start + limit)
+
+        if stop > start:
+            if descending:
+                members = self.redis.zrevrange(rank_key, start, stop - 1, withscores=True)
+            else:
+                members = self.redis.zrange(rank_key, start, stop - 1, withscores=True)
+        else:
+            members = []
+
+        rows = self.redis.hmget(data_key, [store_id for store_id, _ in members]) if members else []
+        return {
+            "total": matched,
+            "rows": [self._deserialize_data(row) for row in rows if row],
+            "next_cursor": str(stop - first) if stop < end else None
+        }
@@ -0,0 +1,252 @@
+import asyncio
+import hashlib
+import math
+import time
+from collections import defaultdict
+from datetime import datetime, date
+
+from app.models.business_menu import StoreMenuHour
+from app.models.stores import StoreTimeZone
+from app.utils.common import strftime
+from app.utils.data_processor import BusinessAnalyzer
+from app.utils.report_worker import build_report_frames, process_calculation_data
+
+Z_95 = 1.96  # two-sided 95% confidence
+
+
+def store_hash(store_id) -> str:
+    """Stable pseudo-random rank of a store, the same store is always sampled first"""
+    return hashlib.md5(str(store_id).encode()).hexdigest()
+
+
+def hours_profile(store_hours: list) -> str:
+    """
+    Business-hours profile of a store
+    24x7: no business hours, short: under 10 open hours a day on average, long: otherwise
+    """
+    if not store_hours:
+        return "24x7"
+
+    open_minutes = 0
+    for _, start_time_local, end_time_local in store_hours:
+        start = datetime.combine(date.min, strftime(start_time_local))
+        end = datetime.combine(date.min, strftime(end_time_local))
+        minutes = (end - start).total_seconds() / 60
+        open_minutes += minutes if minutes > 0 else minutes + 24 * 60  # closes after midnight
+    days = len({day_of_week for day_of_week, _, _ in store_hours})
+    return "short" if open_minutes / days < 10 * 60 else "long"
+
+
+def group_strata(store_timezones: list, store_hour_rows: list) -> dict:
+    """
+    Stores per stratum
+    :return: (timezone, business-hours profile) -> [store_id, ...]
+    """
+    store_hours = defaultdict(list)
+    for store_id, day_of_week, start_time_local, end_time_local in store_hour_rows:
+        store_hours[store_id].append((day_of_week, start_time_local, end_time_local))
+
+    members = defaultdict(list)
+    for store_id, timezone_str in store_timezones:
+        members[(timezone_str, hours_profile(store_hours.get(store_id)))].append(store_id)
+    return dict(members)
+
+
+def measure_sample(model_data: tuple, reporting_window: str) -> dict:
+    """
+    Uptime ratio of the sampled stores in one window, runs in a thread
+    stores without business hours or without polls in the window are not measured,
+    stores with a negative uptime or downtime from the engine are kept as None, to be excluded
+    :return: store_id -> uptime / (uptime + downtime) or None
+    """
+    df_polls, df_business_hours, _ = build_report_frames(*model_data)
+    store_uptime = {}
+    if df_polls.empty or df_business_hours.empty:
+        return store_uptime
+
+    store_hours = dict(tuple(df_business_hours.groupby('store_id')))
+    for store_id, df_store_polls in df_polls.groupby('store_id', sort=False):
+        if store_id not in store_hours:
+            continue
+        result = process_calculation_data(store_id, df_store_polls, store_hours[store_id], reporting_window)
+        uptime = float(result.get(f"uptime_{reporting_window}", 0))
+        downtime = float(result.get(f"downtime_{reporting_window}", 0))
+        if uptime < 0 or downtime < 0:
+            store_uptime[store_id] = None
+        elif uptime + downtime > 0:
+            store_uptime[store_id] = uptime / (uptime + downtime)
+    return store_uptime
+
+
+class ReportPreview:
+    """
+    Approximate fleet-wide uptime from a stratified sample of stores
+    strata: (timezone, business-hours profile)
+    each stratum is sampled by store_id hash, so repeated previews reuse the same stores
+    24x7 stores have no business hours, the report engine gives them no uptime or downtime,
+    so their strata are excluded from the estimate and listed as such
+    """
+    def __init__(self, report_id, sample_rate: float = 0.02, min_per_stratum: int = 3,
+                 max_sample: int = 300, timeout_seconds: float = 60, fetch_chunk: int = 50):
+        self.report_id = report_id
+        self.sample_rate = sample_rate
+        self.min_per_stratum = min_per_stratum
+        self.max_sample = max_sample
+        self.timeout_seconds = timeout_seconds
+        self.fetch_chunk = fetch_chunk  # stores per query, rows are built on the event loop
+        self.analyzer = BusinessAnalyzer(report_id=report_id)
+
+    def allocate(self, members: dict) -> dict:
+        """
+        Sample size of every stratum, max_sample stores at most in total
+        proportional allocation with at least min_per_stratum stores for a variance estimate;
+        over the cap, the largest strata get their minimum first while the budget lasts
+        and the rest of the budget is spread proportionally, strata left at 0 are not sampled
+        """
+        sizes = {
+            stratum: min(len(store_ids), max(self.min_per_stratum, math.ceil(self.sample_rate * len(store_ids))))
+            for stratum, store_ids in members.items()
+        }
+        if sum(sizes.values()) <= self.max_sample:
+            return sizes
+
+        budget = self.max_sample
+        capped = {}
+        for stratum in sorted(members, key=lambda s: (-len(members[s]), s)):
+            minimum = min(self.min_per_stratum, len(members[stratum]))
+            capped[stratum] = minimum if minimum <= budget else 0
+            budget -= capped[stratum]
+
+        covered = sum(len(members[stratum]) for stratum, size in capped.items() if size)
+        remaining = budget
+        for stratum, size in capped.items():
+            if size:
+                share = remaining * len(members[stratum]) // covered
+                capped[stratum] += min(sizes[stratum] - size, share)
+        return capped
+
+    async def build_strata(self) -> tuple[dict, list]:
+        """
+        :return: stratum -> {"population": N_h, "sample": [store_id, ...]},
+            excluded strata with their population and the reason
+        """
+        store_timezones = await StoreTimeZone.all().values_list("store_id", "timezone_str")
+        store_hour_rows = await StoreMenuHour.all().values_list(
+            "store_id", "day_of_week", "start_time_local", "end_time_local")
+        members = await asyncio.to_thread(group_strata, store_timezones, store_hour_rows)
+
+        excluded = [
+            {"timezone": stratum[0], "profile": stratum[1], "population": len(store_ids),
+             "reason": "no_business_hours"}
+            for stratum, store_ids in members.items() if stratum[1] == "24x7"
+        ]
+        measurable = {stratum: store_ids for stratum, store_ids in members.items() if stratum[1] != "24x7"}
+
+        strata = {}
+        for stratum, size in self.allocate(measurable).items():
+            if not size:
+                excluded.append({"timezone": stratum[0], "profile": stratum[1],
+                                 "population": len(measurable[stratum]), "reason": "sample_cap"})
+                continue
+            strata[stratum] = {
+                "population": len(measurable[stratum]),
+                "sample": sorted(measurable[stratum], key=store_hash)[:size]
+            }
+        return strata, excluded
+
+    def estimate_window(self, strata: dict, store_uptime: dict) -> dict:
+        """
+        Stratified mean of per-store uptime ratios with its confidence interval
+        ratios that are missing (None) or outside [0, 1] are excluded and counted in stores_excluded,
+        so the mean stays in [0, 1] and inside its interval
+        strata without any measured store are left out and the weights renormalized,
+        population_covered is the population the estimate stands for
+        """
+        stats, excluded = [], 0
+        for stratum in strata.values():
+            ratios = []
+            for store_id in stratum["sample"]:
+                if store_id not in store_uptime:
+                    continue
+                ratio = store_uptime[store_id]
+                if ratio is None or not 0 <= ratio <= 1:
+                    excluded += 1
+                    continue
+                ratios.append(ratio)
+            if ratios:
+                stats.append((stratum["population"], ratios))
+
+        population = sum(size for size, _ in stats)
+        if not population:
+            return {"uptime_pct": None, "ci_low_pct": None, "ci_high_pct": None, "stores_measured": 0,
+                    "stores_excluded": excluded, "population_covered": 0}
+
+        mean, variance = 0.0, 0.0
+        for size, ratios in stats:
+            weight = size / population
+            stratum_mean = sum(ratios) / len(ratios)
+            stratum_var = sum((r - stratum_mean) ** 2 for r in ratios) / (len(ratios) - 1) if len(ratios) > 1 else 0
+            mean += weight * stratum_mean
+            # finite population correction, a fully sampled stratum adds no error
+            variance += weight ** 2 * (1 - len(ratios) / size) * stratum_var / len(ratios)
+
+        mean = min(1.0, max(0.0, mean))  # float error only, every ratio is in [0, 1]
+        margin = Z_95 * math.sqrt(variance)
+        return {
+            "uptime_pct": round(mean * 100, 2),
+            "ci_low_pct": round(max(0.0, mean - margin) * 100, 2),
+            "ci_high_pct": round(min(1.0, mean + margin) * 100, 2),
+            "stores_measured": sum(len(ratios) for _, ratios in stats),
+            "stores_excluded": excluded,
+            "population_covered": population,
+        }
+
+    async def estimate(self) -> dict:
+        """
+        Compute the preview for every report window
+        uses the report engine on the sampled stores only, fetched in chunks of stores
+        so the event loop stays responsive, the calculation runs in a thread
+        """
+        start_time = time.perf_counter()
+        strata, excluded = await self.build_strata()
+        sample = [store_id for stratum in strata.values() for store_id in stratum["sample"]]
+
+        windows = {}
+        for window in ['last_hour', 'last_day', 'last_week']:
+            store_uptime = {}
+            if sample:
+                model_data = ([], [], [])
+                for i in range(0, len(sample), self.fetch_chunk):
+                    chunk_data = await self.analyzer.fetch_model_data(window, store_ids=sample[i:i + self.fetch_chunk])
+                    for rows, chunk_rows in zip(model_data, chunk_data):
+                        rows.extend(chunk_rows)
+                store_uptime = await asyncio.to_thread(measure_sample, model_data, window)
+            windows[window] = self.estimate_window(strata, store_uptime)
+
+        return {
+            "windows": windows,
+            "sampled_stores": len(sample),
+            "population": sum(stratum["population"] for stratum in strata.values()),
+            "strata": len(strata),
+            "excluded_strata": excluded,
+            "excluded_stores": sum(stratum["population"] for stratum in excluded),
+            "confidence": 0.95,
+            "elapsed_seconds": round(time.perf_counter() - start_time, 2),
+        }
+
+    async def publish(self, report_manager) -> dict:
+        """
+        Compute the preview and keep it on the report status
+        bounded by timeout_seconds, a preview that times out or fails is published with that status
+        """
+        try:
+            preview = await asyncio.wait_for(self.estimate(), timeout=self.timeout_seconds)
+            preview["status"] = "ready"
+        except asyncio.TimeoutError:
+            preview = {"status": "timed_out", "timeout_seconds": self.timeout_seconds}
+        except Exception as e:
+            print(f"Report {self.report_id} preview failed: {str(e)}")
+            preview = {"status": "failed", "error": str(e)}
+
+        await report_manager.update_report_details(self.report_id, {"preview": preview})
+        return preview
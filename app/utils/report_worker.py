@@ -0,0 +1,101 @@
+# Pool worker entry for report calculations
+# kept free of the app graph (FastAPI, Tortoise, Redis): pool tasks reference this module,
+# so it is all a worker process imports besides pandas and pytz
+from datetime import datetime, date
+
+import pandas as pd
+
+from app.utils.common import convert_to_business_timezone, strftime
+
+
+def process_calculation_data(store_id, df_polls, df_business_hours, reporting_window):
+    """
+    Uptime and downtime of one store in one reporting window
+    df_polls: polls with timestamp_local, df_business_hours: store_menu_hour rows
+    """
+    df_store_polls = df_polls[df_polls['store_id'] == store_id]
+    df_store_hours = df_business_hours[df_business_hours['store_id'] == store_id]
+
+    if df_store_hours.empty:
+        return {
+            'store_id': store_id,
+            **{f'{metric}_{window}': 0 for metric in ['uptime', 'downtime'] for window in
+               ['last_hour', 'last_day', 'last_week']}
+        }
+
+    class GetTimeWindows:
+        def __init__(self, df_store_hour):
+            # start window time from store hours
+            # start time: min (start time local for each day)
+            self.start_window_time = df_store_hour['start_time_local'].min()
+
+            # stop window time from store hours
+            # stop time: max(stop time local for each day)
+            self.stop_window_time = df_store_hour['end_time_local'].max()
+
+    get_time_windows = GetTimeWindows(df_store_hours)
+
+    start_window_time = get_time_windows.start_window_time
+    stop_window_time = get_time_windows.stop_window_time
+
+    intervals = []
+    prev_time = strftime(start_window_time)
+    prev_status = False  # inactive
+
+    for _, row in df_store_polls.iterrows():
+        current_time = datetime.fromisoformat(row['timestamp_local'])
+        t_as_datetime = datetime.combine(current_time.date(), prev_time)
+        duration = ((current_time - t_as_datetime).total_seconds() / 60)  # in minutes
+        intervals.append((duration, prev_status))
+        prev_time = current_time.time()
+        prev_status = row['status']
+
+    stop_window = strftime(stop_window_time)
+    # t_as_datetime = datetime.combine(prev_time.date(), stop_window)
+    if prev_time < stop_window:
+        prev_time = datetime.combine(date.min, prev_time)
+        stop_window = datetime.combine(date.min, stop_window)
+        duration = (stop_window - prev_time).total_seconds() / 60
+        intervals.append((duration, prev_status))
+
+    uptime = round(sum(d / 60 for d, s in intervals if s), 2) if (
+            reporting_window in ['last_day', 'last_week']
+    ) else round(sum(d for d, s in intervals if s), 2)
+
+    downtime = round(sum(d / 60 for d, s in intervals if not s), 2) if (
+            reporting_window in ['last_day', 'last_week']
+    ) else round(sum(d for d, s in intervals if not s), 2)
+
+    # return time window uptime, downtime
+    return {
+        'store_id': store_id,
+        f"uptime_{reporting_window}": f"{uptime}",
+        f"downtime_{reporting_window}": f"{downtime}"
+    }
+
+
+def build_report_frames(df_store_data: list, df_business_hours_data: list, df_timezones_data: list):
+    """
+    Report frames of one window from the fetched rows
+    polls get their local timestamp, newest first; business hours of stores without a timezone are dropped
+    :return: df_status, df_business_hours, df_timezones
+    """
+    # Convert to pandas DataFrames
+    df_status = pd.DataFrame(df_store_data)
+    df_business_hours = pd.DataFrame(df_business_hours_data)
+    df_timezones = pd.DataFrame(df_timezones_data)
+
+    if not df_timezones.empty:
+        # Filter out rows with missing store_id in df_timezones
+        if not df_business_hours.empty:
+            df_business_hours = df_business_hours[df_business_hours['store_id'].isin(df_timezones['store_id'])]
+            # df_business_hours = sorted(df_business_hours['store_id'].unique())
+            # df_business_hours = pd.DataFrame({'store_id': df_business_hours})
+
+        # Convert timestamps into business timezone datetime objects
+        if not df_status.empty:
+            df_status['timestamp_local'] = df_status.apply(convert_to_business_timezone, args=(df_timezones,),
+                                                           axis=1)
+            df_status = df_status.sort_values(by='timestamp_local', ascending=False)
+
+    return df_status, df_business_hours, df_timezones
@@ -0,0 +1,283 @@
+"""
+Load test for the reports API
+
+runs the real FastAPI app from main.py in a uvicorn server thread against
+local stand-ins: a SQLite file (or --database-url) and fakeredis (or --redis-url),
+seeded with synthetic stores, business hours and polls
+
+phases:
+    baseline: status polling while no report is running
+    under_load: status polling while --reports reports run in the background
+records p50/p95/p99 latency and error rate per endpoint and phase
+
+usage (from the repo root):
+    python -m benchmarks.load_reports --stores 500 --clients 20 --duration 30
+    python -m benchmarks.load_reports --max-p95-ms 250  # exit 1 on regression
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import uvicorn
+from tortoise import Tortoise
+
+from app.orm_conn.tortoise_config import TORTOISE_ORM
+from app.models.business_menu import StoreMenuHour
+from app.models.stores import StorePolls, StoreTimeZone
+
+TIMEZONES = ["America/Chicago", "America/New_York", "America/Denver", "America/Los_Angeles", "America/Boise"]
+
+
+async def seed_synthetic_data(stores: int, days: int, seed: int):
+    """
+    Seed stores with hourly polls over the last `days` days
+    a third of the stores has no business hours (open 24*7)
+    statuses flip with a small probability to give realistic runs
+    """
+    rng = random.Random(seed)
+    now_utc = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+    timezones, menu_hours, polls = [], [], []
+    for index in range(stores):
+        store_id = uuid.UUID(int=rng.getrandbits(128))
+        timezones.append(StoreTimeZone(store_id=store_id, timezone_str=TIMEZONES[index % len(TIMEZONES)]))
+
+        if index % 3:
+            open_hour = rng.choice([6, 8, 10])
+            close_hour = open_hour + rng.choice([8, 10, 12])
+            menu_hours.extend(
+                StoreMenuHour(store_id=store_id, day_of_week=day,
+                              start_time_local=f"{open_hour:02d}:00:00",
+                              end_time_local=f"{close_hour:02d}:00:00")
+                for day in range(7)
+            )
+
+        status = True
+        for hour in range(days * 24, 0, -1):
+            if rng.random() < 0.05:
+                status = not status
+            polls.append(StorePolls(store_id=store_id,
+                                    timestamp_utc=now_utc - timedelta(hours=hour, minutes=rng.randint(0, 59)),
+                                    status=status))
+
+    await StoreTimeZone.bulk_create(timezones, batch_size=1000)
+    await StoreMenuHour.bulk_create(menu_hours, batch_size=1000)
+    await StorePolls.bulk_create(polls, batch_size=1000)
+    return len(polls)
+
+
+async def prepare_database(stores: int, days: int, seed: int) -> int:
+    await Tortoise.init(config=TORTOISE_ORM)
+    try:
+        await Tortoise.generate_schemas()
+        return await seed_synthetic_data(stores, days, seed)
+    finally:
+        await Tortoise.close_connections()
+
+
+def use_redis(redis_url: str = None):
+    """Point the report manager at a local Redis or a fakeredis instance"""
+    if redis_url:
+        import redis
+        client = redis.Redis.from_url(redis_url, decode_responses=True)
+    else:
+        try:
+            import fakeredis
+        except ImportError:
+            sys.exit("fakeredis is not installed, install it or pass --redis-url")
+        client = fakeredis.FakeRedis(decode_responses=True)
+
+    from app.routes import report
+    report.report_manager.redis = client
+
+
+class ServerThread(threading.Thread):
+    """uvicorn serving main.app on its own event loop"""
+    def __init__(self, port: int):
+        super().__init__(daemon=True)
+        from main import app
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        # signals belong to the main thread
+        self.server.install_signal_handlers = lambda: None
+
+    def run(self):
+        self.server.run()
+
+    def wait_started(self, timeout: float = 30):
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.is_alive():
+                sys.exit("API server failed to start")
+            time.sleep(0.05)
+
+    def stop(self):
+        self.server.should_exit = True
+        self.join(timeout=30)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self.samples = {}  # (phase, endpoint) -> [(seconds, ok)]
+
+    async def request(self, client: httpx.AsyncClient, phase: str, endpoint: str, url: str):
+        start_time = time.perf_counter()
+        try:
+            response = await client.get(url)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            response, ok = None, False
+        self.samples.setdefault((phase, endpoint), []).append((time.perf_counter() - start_time, ok))
+        return response
+
+    def summary(self) -> dict:
+        summary = {}
+        for (phase, endpoint), samples in self.samples.items():
+            latencies = sorted(seconds * 1000 for seconds, _ in samples)
+            quantiles = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 \
+                else latencies * 99
+            summary.setdefault(phase, {})[endpoint] = {
+                "requests": len(samples),
+                "error_rate": round(sum(1 for _, ok in samples if not ok) / len(samples), 4),
+                "p50_ms": round(quantiles[49], 2),
+                "p95_ms": round(quantiles[94], 2),
+                "p99_ms": round(quantiles[98], 2),
+                "max_ms": round(latencies[-1], 2),
+            }
+        return summary
+
+
+async def poll_status(client, recorder: LatencyRecorder, phase: str, report_ids: list, stop_at: float,
+                      interval: float):
+    while time.monotonic() < stop_at:
+        await recorder.request(client, phase, "get_report", f"/reports/get_report/{random.choice(report_ids)}")
+        await asyncio.sleep(interval)
+
+
+async def trigger_report(client, recorder: LatencyRecorder, phase: str):
+    response = await recorder.request(client, phase, "trigger_report", "/reports/trigger_report")
+    if response is not None and response.status_code == 200:
+        return response.json()["report_id"]
+
+
+async def wait_for_reports(client, report_ids: list, timeout: float) -> dict:
+    deadline = time.monotonic() + timeout
+    statuses = {}
+    while time.monotonic() < deadline:
+        for report_id in report_ids:
+            response = await client.get(f"/reports/get_report/{report_id}")
+            statuses[report_id] = response.json().get("status") if response.status_code == 200 else "missing"
+        if all(status in ("completed", "failed", "cancelled", "missing") for status in statuses.values()):
+            break
+        await asyncio.sleep(0.5)
+    return statuses
+
+
+async def run_load(base_url: str, args) -> dict:
+    recorder = LatencyRecorder()
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.request_timeout) as client:
+        # a finished report to poll during the baseline
+        warmup_id = await trigger_report(client, recorder, "warmup")
+        if warmup_id is None:
+            sys.exit("Could not trigger the warmup report")
+        await wait_for_reports(client, [warmup_id], args.report_timeout)
+
+        stop_at = time.monotonic() + args.baseline_duration
+        await asyncio.gather(*(
+            poll_status(client, recorder, "baseline", [warmup_id], stop_at, args.poll_interval)
+            for _ in range(args.clients)
+        ))
+
+        report_ids = [warmup_id]
+        for _ in range(args.reports):
+            report_id = await trigger_report(client, recorder, "under_load")
+            if report_id:
+                report_ids.append(report_id)
+
+        stop_at = time.monotonic() + args.duration
+        await asyncio.gather(*(
+            poll_status(client, recorder, "under_load", report_ids, stop_at, args.poll_interval)
+            for _ in range(args.clients)
+        ))
+        statuses = await wait_for_reports(client, report_ids[1:], args.report_timeout)
+
+    summary = recorder.summary()
+    summary.pop("warmup", None)
+    baseline_p95 = summary.get("baseline", {}).get("get_report", {}).get("p95_ms")
+    load_p95 = summary.get("under_load", {}).get("get_report", {}).get("p95_ms")
+    summary["degradation_p95"] = round(load_p95 / baseline_p95, 2) if baseline_p95 and load_p95 else None
+    summary["reports"] = statuses
+    return summary
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test /reports/trigger_report and /reports/get_report")
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--redis-url", help="defaults to fakeredis")
+    parser.add_argument("--stores", type=int, default=200)
+    parser.add_argument("--days", type=int, default=14, help="days of hourly polls to seed")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--clients", type=int, default=20, help="concurrent status polling clients")
+    parser.add_argument("--reports", type=int, default=2, help="reports triggered during the load phase")
+    parser.add_argument("--poll-interval", type=float, default=0.05, help="seconds between polls per client")
+    parser.add_argument("--baseline-duration", type=float, default=10)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--request-timeout", type=float, default=30)
+    parser.add_argument("--report-timeout", type=float, default=600)
+    parser.add_argument("--max-p95-ms", type=float, help="fail when get_report p95 under load exceeds this")
+    parser.add_argument("--max-error-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="write the JSON summary to this file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="report-load-")
+    TORTOISE_ORM["connections"]["default"] = args.database_url or f"sqlite://{workdir}/store_manager.sqlite3"
+    use_redis(args.redis_url)
+
+    polls = asyncio.run(prepare_database(args.stores, args.days, args.seed))
+    print(f"Seeded {args.stores} stores, {polls} polls")
+
+    # reports are written to report_data/ under the cwd
+    os.chdir(workdir)
+    server = ServerThread(free_port())
+    server.start()
+    server.wait_started()
+    try:
+        summary = asyncio.run(run_load(f"http://127.0.0.1:{server.server.config.port}", args))
+    finally:
+        server.stop()
+
+    output = json.dumps(summary, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+    under_load = summary.get("under_load", {}).get("get_report", {})
+    if args.max_p95_ms is not None and under_load.get("p95_ms", 0) > args.max_p95_ms:
+        sys.exit(f"get_report p95 {under_load['p95_ms']}ms exceeds {args.max_p95_ms}ms")
+    if under_load.get("error_rate", 0) > args.max_error_rate:
+        sys.exit(f"get_report error rate {under_load['error_rate']} exceeds {args.max_error_rate}")
+
+
+if __name__ == "__main__":
+    main()
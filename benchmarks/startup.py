@@ -0,0 +1,149 @@
+"""
+Startup benchmark for the API and report worker processes
+
+every run is a fresh interpreter
+    api: imports `main` (what uvicorn imports before the lifespan runs) and reports import time,
+        peak RSS and which heavy modules were pulled in
+    worker: starts a report pool with the engine's multiprocessing context (or --start-method)
+        and runs one pickled store calculation through it, twice: the first pool pays the cold start
+        (for forkserver: starting the server and its preload), the second is what every later report pays;
+        RSS and heavy modules are read inside the worker after its task;
+        the probe runs under `python -c`, which leaves no __main__ for workers to re-import,
+        a server entry point adds its own imports to every worker (see get_pool_context)
+
+usage (from the repo root):
+    python -m benchmarks.startup --repeat 5
+    python -m benchmarks.startup --start-method spawn
+"""
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+
+ENTRY_POINTS = {
+    "api": "main",
+}
+
+HEAVY_MODULES = ["pandas", "numpy", "redis", "tortoise", "fastapi", "dotenv", "pytz"]
+
+PROBE = """
+import importlib, json, resource, sys, time
+baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start_time = time.perf_counter()
+importlib.import_module({module!r})
+import_seconds = time.perf_counter() - start_time
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+scale = 1 if sys.platform == "darwin" else 1024  # ru_maxrss is bytes on macOS, KiB on Linux
+print(json.dumps({{
+    "import_ms": import_seconds * 1000,
+    "rss_mb": rss * scale / 2 ** 20,
+    "rss_added_mb": (rss - baseline_rss) * scale / 2 ** 20,
+    "modules": len(sys.modules),
+    "heavy_modules": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+WORKER_PROBE = """
+import json, time
+from datetime import datetime, timedelta
+from multiprocessing import get_context
+import pandas as pd
+from app.utils.data_processor import get_pool_context
+from app.utils.report_worker import process_calculation_data
+from benchmarks.startup import worker_stats
+
+start_method = {start_method!r}
+context = get_context(start_method) if start_method else get_pool_context()
+day = datetime(2026, 1, 5)
+df_polls = pd.DataFrame([
+    {{"store_id": 1, "status": hour % 3 != 0,
+      "timestamp_local": (day + timedelta(hours=hour)).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-4]}}
+    for hour in range(23, 8, -1)
+])
+df_business_hours = pd.DataFrame([
+    {{"store_id": 1, "day_of_week": 0, "start_time_local": "09:00:00", "end_time_local": "23:00:00"}}
+])
+
+first_task_ms = []
+for _ in range(2):
+    start_time = time.perf_counter()
+    with context.Pool(processes=1) as pool:
+        pool.apply(process_calculation_data, (1, df_polls, df_business_hours, "last_day"))
+        first_task_ms.append((time.perf_counter() - start_time) * 1000)
+        stats = pool.apply(worker_stats, ({heavy!r},))
+print(json.dumps({{"start_method": context.get_start_method(), "cold_pool_ms": first_task_ms[0],
+                  "warm_pool_ms": first_task_ms[1], **stats}}))
+"""
+
+
+def worker_stats(heavy_modules: list) -> dict:
+    """Runs inside a pool worker, after its first task"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    scale = 1 if sys.platform == "darwin" else 1024
+    return {
+        "rss_mb": rss * scale / 2 ** 20,
+        "modules": len(sys.modules),
+        "heavy_modules": [name for name in heavy_modules if name in sys.modules],
+    }
+
+
+def run_probe(code: str) -> dict:
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(f"Probe failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def probe(module: str) -> dict:
+    return run_probe(PROBE.format(module=module, heavy=HEAVY_MODULES))
+
+
+def probe_worker(start_method: str = None) -> dict:
+    return run_probe(WORKER_PROBE.format(start_method=start_method, heavy=HEAVY_MODULES))
+
+
+def benchmark(repeat: int, start_method: str = None) -> dict:
+    summary = {}
+    for name, module in ENTRY_POINTS.items():
+        runs = [probe(module) for _ in range(repeat)]
+        summary[name] = {
+            "module": module,
+            "import_ms_median": round(statistics.median(run["import_ms"] for run in runs), 1),
+            "import_ms_min": round(min(run["import_ms"] for run in runs), 1),
+            "rss_mb_median": round(statistics.median(run["rss_mb"] for run in runs), 1),
+            "rss_added_mb_median": round(statistics.median(run["rss_added_mb"] for run in runs), 1),
+            "modules": runs[-1]["modules"],
+            "heavy_modules": runs[-1]["heavy_modules"],
+        }
+
+    runs = [probe_worker(start_method) for _ in range(repeat)]
+    summary["worker"] = {
+        "start_method": runs[-1]["start_method"],
+        "cold_pool_ms_median": round(statistics.median(run["cold_pool_ms"] for run in runs), 1),
+        "warm_pool_ms_median": round(statistics.median(run["warm_pool_ms"] for run in runs), 1),
+        "rss_mb_median": round(statistics.median(run["rss_mb"] for run in runs), 1),
+        "modules": runs[-1]["modules"],
+        "heavy_modules": runs[-1]["heavy_modules"],
+    }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure start-up time and RSS of the API and report workers")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per entry point")
+    parser.add_argument("--start-method", choices=["spawn", "forkserver", "fork"],
+                        help="worker start method, the report engine's choice by default")
+    parser.add_argument("--output", help="write the JSON summary to this file")
+    args = parser.parse_args()
+
+    output = json.dumps(benchmark(args.repeat, args.start_method), indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import argparse
+from datetime import timedelta
+
+from tortoise import Tortoise, run_async
+from app.db_conn.db_config import DATABASE_URL, POLL_COMPACTION_AGE_DAYS
+
+from app.utils.poll_compaction import compact_store_polls
+
+# initialize db
+async def init_db_stores():
+    await Tortoise.init(
+        db_url=DATABASE_URL,
+        modules={"models": ["app.models.stores"]},
+    )
+    await Tortoise.generate_schemas()
+
+async def main(older_than_days: int):
+    await init_db_stores()
+    try:
+        stats = await compact_store_polls(timedelta(days=older_than_days))
+        print(f"Compacted store polls: {stats}")
+    finally:
+        await Tortoise.close_connections()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact historical store polls into status intervals")
+    parser.add_argument("--older-than-days", type=int, default=POLL_COMPACTION_AGE_DAYS,
+                        help="compact and remove polls older than this many days")
+    args = parser.parse_args()
+    run_async(main(args.older_than_days))
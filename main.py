@@ -1,23 +1,36 @@
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
-import pytz
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from tortoise.contrib.fastapi import RegisterTortoise
 
-from app.orm_conn.tortoise_config import TORTOISE_ORM as tortoise_config
-from app.routes import report
+from app.db_conn.redis_confg import create_redis_client
+from app.orm_conn.tortoise_config import get_tortoise_config
+from app.routes import report, ingest
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     # app startup
+    # connections are created here, not at import, keep a client bound beforehand (e.g. tests)
+    redis_client = None
+    if report.report_manager.redis is None:
+        redis_client = report.report_manager.redis = create_redis_client()
+
     async with RegisterTortoise(
             app,
-            tortoise_config,
+            get_tortoise_config(),
             generate_schemas=True,
             add_exception_handlers=True):
-        yield
+        await ingest.poll_buffer.start()
+        try:
+            yield
+        finally:
+            # drain buffered polls before connections close
+            await ingest.poll_buffer.stop()
+            if redis_client is not None:
+                redis_client.close()
+                report.report_manager.redis = None
 
 
 app = FastAPI(
@@ -43,4 +56,5 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(report.router)
\ No newline at end of file
+app.include_router(report.router)
+app.include_router(ingest.router)
\ No newline at end of file
@@ -0,0 +1,20 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "store_status_interval" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "store_id" UUID NOT NULL,
+    "start_utc" TIMESTAMPTZ NOT NULL,
+    "end_utc" TIMESTAMPTZ NOT NULL,
+    "status" BOOL NOT NULL DEFAULT False
+);
+CREATE INDEX IF NOT EXISTS "idx_store_statu_store_i_5b1f3e" ON "store_status_interval" ("store_id", "start_utc");
+CREATE INDEX IF NOT EXISTS "idx_store_statu_start_u_8c2d41" ON "store_status_interval" ("start_utc", "end_utc");
+COMMENT ON TABLE "store_status_interval" IS 'Run-length-encoded store status';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "store_status_interval";"""
@@ -0,0 +1,17 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "storereportsstatus" ADD "created_at" TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP;
+        ALTER TABLE "storereportsstatus" ADD "completed_at" TIMESTAMPTZ;
+        ALTER TABLE "storereportsstatus" ADD "duration_seconds" DOUBLE PRECISION;
+        CREATE INDEX IF NOT EXISTS "idx_storereport_created_3f9a1c" ON "storereportsstatus" ("created_at");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_storereport_created_3f9a1c";
+        ALTER TABLE "storereportsstatus" DROP COLUMN "created_at";
+        ALTER TABLE "storereportsstatus" DROP COLUMN "completed_at";
+        ALTER TABLE "storereportsstatus" DROP COLUMN "duration_seconds";"""
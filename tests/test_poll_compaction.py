@@ -0,0 +1,92 @@
+import asyncio
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from tortoise import Tortoise
+
+from app.models.business_menu import StoreMenuHour
+from app.models.stores import StorePolls, StoreTimeZone, StoreStatusInterval
+from app.utils.data_processor import BusinessAnalyzer
+from app.utils.poll_compaction import collapse_polls, compact_store_polls
+
+TIMEZONES = ["America/Chicago", "America/New_York", "America/Denver", "America/Los_Angeles"]
+
+
+async def seed(stores: int = 40, days: int = 16):
+    rng = random.Random(7)
+    now_utc = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    for index in range(stores):
+        store_id = uuid.UUID(int=rng.getrandbits(128))
+        await StoreTimeZone.create(store_id=store_id, timezone_str=TIMEZONES[index % len(TIMEZONES)])
+        open_hour = rng.choice([0, 6, 9])
+        close_hour = rng.choice([17, 21, 23])
+        await StoreMenuHour.bulk_create([
+            StoreMenuHour(store_id=store_id, day_of_week=day,
+                          start_time_local=f"{open_hour:02d}:00:00", end_time_local=f"{close_hour:02d}:59:59")
+            for day in range(7)
+        ])
+        status, polls = True, []
+        for hour in range(days * 24, 0, -1):
+            if rng.random() < 0.2:
+                status = not status
+            polls.append(StorePolls(store_id=store_id, status=status,
+                                    timestamp_utc=now_utc - timedelta(hours=hour, minutes=rng.randint(0, 59))))
+        await StorePolls.bulk_create(polls)
+
+
+async def report_results() -> dict:
+    analyzer = BusinessAnalyzer(report_id=uuid.uuid4())
+    results = {}
+    for window in ['last_hour', 'last_day', 'last_week']:
+        df_polls, df_business_hours, _ = await analyzer.preprocess_model_data(window)
+        if df_polls.empty:
+            continue
+        store_hours = dict(tuple(df_business_hours.groupby('store_id')))
+        for store_id, df_store_polls in df_polls.groupby('store_id'):
+            result = analyzer.process_calculation_data(store_id, df_store_polls, store_hours[store_id], window)
+            results[(str(store_id), window)] = (result[f"uptime_{window}"], result[f"downtime_{window}"])
+    return results
+
+
+async def compare_before_after_compaction():
+    await Tortoise.init(db_url="sqlite://:memory:", modules={
+        "models": ["app.models.stores", "app.models.business_menu", "app.models.report"]
+    })
+    try:
+        await Tortoise.generate_schemas()
+        await seed()
+        before = await report_results()
+        polls_before = await StorePolls.all().count()
+
+        stats = await compact_store_polls(timedelta(days=1))
+        after = await report_results()
+
+        assert stats["polls_compacted"] > 0
+        assert await StoreStatusInterval.all().count() == stats["intervals_created"] < stats["polls_compacted"]
+        assert await StorePolls.all().count() == polls_before - stats["polls_compacted"]
+        return before, after
+    finally:
+        await Tortoise.close_connections()
+
+
+def test_report_unchanged_by_compaction():
+    before, after = asyncio.run(compare_before_after_compaction())
+    assert any(window == 'last_week' for _, window in before)
+    assert after == before
+
+
+def test_collapse_polls_splits_runs_at_utc_midnight():
+    store_id = uuid.uuid4()
+    day = datetime(2026, 1, 5, tzinfo=timezone.utc)
+    polls = [
+        (store_id, day + timedelta(hours=20), True),
+        (store_id, day + timedelta(hours=23), True),
+        (store_id, day + timedelta(hours=25), True),
+        (store_id, day + timedelta(hours=26), False),
+    ]
+    assert [(i["start_utc"], i["end_utc"], i["status"]) for i in collapse_polls(polls)] == [
+        (day + timedelta(hours=20), day + timedelta(hours=23), True),
+        (day + timedelta(hours=25), day + timedelta(hours=25), True),
+        (day + timedelta(hours=26), day + timedelta(hours=26), False),
+    ]
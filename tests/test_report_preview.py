@@ -0,0 +1,53 @@
+import random
+import uuid
+
+from app.utils.report_preview import ReportPreview
+
+
+def stratum_members(sizes: dict) -> dict:
+    return {stratum: [uuid.uuid4() for _ in range(size)] for stratum, size in sizes.items()}
+
+
+def test_allocate_keeps_proportional_sizes_under_the_cap():
+    preview = ReportPreview(uuid.uuid4(), sample_rate=0.1, min_per_stratum=3, max_sample=300)
+    members = stratum_members({("America/Chicago", "long"): 200, ("America/Denver", "short"): 10})
+    assert preview.allocate(members) == {("America/Chicago", "long"): 20, ("America/Denver", "short"): 3}
+
+
+def test_allocate_never_exceeds_max_sample():
+    preview = ReportPreview(uuid.uuid4(), sample_rate=0.75, min_per_stratum=3, max_sample=20)
+    sizes = {(f"tz_{index}", "long"): size for index, size in enumerate([120, 60, 30, 9, 7, 5, 4, 2])}
+    allocation = preview.allocate(stratum_members(sizes))
+
+    assert sum(allocation.values()) <= 20
+    # minimums go to the largest strata first, a stratum whose minimum no longer fits is not sampled
+    assert all(allocation[(f"tz_{index}", "long")] >= 3 for index in range(6))
+    assert allocation[("tz_6", "long")] == 0
+    assert all(allocation[stratum] <= size for stratum, size in sizes.items())
+
+
+def test_estimate_window_excludes_invalid_ratios():
+    preview = ReportPreview(uuid.uuid4())
+    sample = [uuid.uuid4() for _ in range(6)]
+    strata = {("America/Chicago", "long"): {"population": 60, "sample": sample}}
+    store_uptime = dict(zip(sample, [0.2, 0.4, 0.6, -0.8, 1.3, None]))
+
+    window = preview.estimate_window(strata, store_uptime)
+    assert window["stores_measured"] == 3
+    assert window["stores_excluded"] == 3
+    assert window["uptime_pct"] == 40.0
+    assert window["ci_low_pct"] <= window["uptime_pct"] <= window["ci_high_pct"]
+
+
+def test_estimate_window_interval_contains_the_estimate():
+    rng = random.Random(7)
+    preview = ReportPreview(uuid.uuid4())
+    for _ in range(200):
+        strata, store_uptime = {}, {}
+        for index in range(rng.randint(1, 5)):
+            sample = [uuid.uuid4() for _ in range(rng.randint(1, 6))]
+            strata[(f"tz_{index}", "long")] = {"population": len(sample) + rng.randint(0, 100), "sample": sample}
+            store_uptime.update({store_id: rng.choice([0.0, 1.0, rng.random()]) for store_id in sample})
+
+        window = preview.estimate_window(strata, store_uptime)
+        assert 0 <= window["ci_low_pct"] <= window["uptime_pct"] <= window["ci_high_pct"] <= 100